@@ -1,74 +1,219 @@
 import os
+import sys
+import glob
+import time
+import json
+import hmac
 import subprocess
+import queue
+import threading
+import atexit
 from functools import wraps
-from flask import Flask, jsonify, abort, request
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, abort, request
+from werkzeug.routing import BaseConverter
 import shutil  # 用于 shutil.which
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from dotenv import load_dotenv # 用于加载 .env 文件
 
-# 尝试加载 .env 文件 (如果存在)
-# 确保 .env 文件与 app.py 在同一目录，或者在打包后与 .exe 在同一目录
-dotenv_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
-if os.path.exists(dotenv_path):
-    print(f"Loading .env file from: {dotenv_path}")
-    load_dotenv(dotenv_path=dotenv_path)
-else:
-    print("No .env file found. Using default configurations.")
+# 脚本/exe 所在目录，.env 与日志文件都放在这里
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+@dataclass(frozen=True)
+class Config:
+    api_auth_enabled: bool
+    expected_api_key: str
+    flask_host: str
+    flask_port: int
+    flask_debug_mode: bool
+    waitress_threads: int
+    waitress_connection_limit: int
+    waitress_channel_timeout: int
+    twinkle_tray_path: str
+    twinkle_tray_path_found: bool
+    log_file_path: str
+
+def _find_twinkle_tray():
+    # 优先使用环境变量 TWINKLE_TRAY_PATH，其次是常见安装位置，找到第一个即停止
+    env_path = os.getenv('TWINKLE_TRAY_PATH')
+    local_app_data = os.getenv('LOCALAPPDATA')
+    candidates = [env_path] if env_path else []
+    if local_app_data:
+        candidates += [
+            os.path.join(local_app_data, "Programs", "twinkle-tray", "Twinkle Tray.exe"),
+            os.path.join(local_app_data, "twinkle-tray", "Twinkle Tray.exe")
+        ]
+    found_path = next((path for path in candidates if os.path.isfile(path)), None)
+    if found_path: return found_path, True
+    return "Twinkle Tray.exe", False # 最终回退，依赖 PATH
+
+def _bootstrap_config():
+    # 尝试加载 .env 文件 (如果存在)
+    # 确保 .env 文件与 app.py 在同一目录，或者在打包后与 .exe 在同一目录
+    dotenv_path = os.path.join(SCRIPT_DIR, '.env')
+    if os.path.isfile(dotenv_path):
+        print(f"Loading .env file from: {dotenv_path}")
+        load_dotenv(dotenv_path=dotenv_path)
+    else:
+        print("No .env file found. Using default configurations.")
+
+    twinkle_tray_path, twinkle_tray_path_found = _find_twinkle_tray()
+    return Config(
+        # 默认不启用API鉴权
+        api_auth_enabled=os.getenv('API_AUTH_ENABLED', 'False').lower() == 'true',
+        expected_api_key=os.getenv('API_KEY', 'you_should_really_set_a_key_if_auth_is_enabled'),
+        # 默认监听所有IP (0.0.0.0) 和 5000 端口
+        flask_host=os.getenv('FLASK_HOST', '0.0.0.0'),
+        flask_port=int(os.getenv('FLASK_PORT', 5000)),
+        flask_debug_mode=os.getenv('FLASK_DEBUG', 'False').lower() == 'true', # 生产环境应为 False
+        # Waitress 默认支持 HTTP/1.1 keep-alive，轮询客户端可复用连接
+        waitress_threads=int(os.getenv('WAITRESS_THREADS', 8)),
+        waitress_connection_limit=int(os.getenv('WAITRESS_CONNECTION_LIMIT', 1000)),
+        waitress_channel_timeout=int(os.getenv('WAITRESS_CHANNEL_TIMEOUT', 120)), # 秒，空闲 keep-alive 连接保持时间
+        twinkle_tray_path=twinkle_tray_path,
+        twinkle_tray_path_found=twinkle_tray_path_found,
+        log_file_path=os.path.join(SCRIPT_DIR, 'flask_api.log'),
+    )
+
+config = _bootstrap_config()
 
 
 # --- Core Application Setup ---
 app = Flask(__name__)
 
+class IntOrAllConverter(BaseConverter):
+    """匹配非负整数或 'all' (不区分大小写)，数字转换为 int，其余统一为 "all"。"""
+    regex = r'(?:\d+|[Aa][Ll][Ll])'
+
+    def to_python(self, value):
+        return int(value) if value.isdigit() else "all"
+
+    def to_url(self, value):
+        return str(value)
+
+app.url_map.converters['int_or_all'] = IntOrAllConverter
+
 # --- Configuration from .env or Defaults ---
-# API Authentication
-# 默认不启用API鉴权
-API_AUTH_ENABLED_STR = os.getenv('API_AUTH_ENABLED', 'False') # 默认 'False'
-app.config['API_AUTH_ENABLED'] = API_AUTH_ENABLED_STR.lower() == 'true'
-app.config['EXPECTED_API_KEY'] = os.getenv('API_KEY', 'you_should_really_set_a_key_if_auth_is_enabled')
-
-# Flask Server Settings
-# 默认监听所有IP (0.0.0.0) 和 5000 端口
-FLASK_HOST = os.getenv('FLASK_HOST', '0.0.0.0')
-FLASK_PORT = int(os.getenv('FLASK_PORT', 5000))
-FLASK_DEBUG_MODE = os.getenv('FLASK_DEBUG', 'False').lower() == 'true' # 生产环境应为 False
-
-# Twinkle Tray Path Configuration
-# 优先使用环境变量 TWINKLE_TRAY_PATH
-TWINKLE_TRAY_ENV_PATH = os.getenv('TWINKLE_TRAY_PATH')
-twinkle_tray_base_path = "Twinkle Tray.exe" # 最终回退，依赖 PATH
-twinkle_tray_base_path_found = False
-
-if TWINKLE_TRAY_ENV_PATH and os.path.exists(TWINKLE_TRAY_ENV_PATH):
-    twinkle_tray_base_path = TWINKLE_TRAY_ENV_PATH
-    twinkle_tray_base_path_found = True
-    # print(f"Using Twinkle Tray from TWINKLE_TRAY_PATH: {twinkle_tray_base_path}")
-else:
-    local_app_data = os.getenv('LOCALAPPDATA')
-    if local_app_data:
-        paths_to_check = [
-            os.path.join(local_app_data, "Programs", "twinkle-tray", "Twinkle Tray.exe"),
-            os.path.join(local_app_data, "twinkle-tray", "Twinkle Tray.exe")
-        ]
-        for path in paths_to_check:
-            if os.path.exists(path):
-                twinkle_tray_base_path = path
-                twinkle_tray_base_path_found = True
-                break
-    # 如果上述路径都未找到，则会使用默认的 "Twinkle Tray.exe" (依赖PATH)
+API_AUTH_ENABLED = config.api_auth_enabled
+EXPECTED_API_KEY = config.expected_api_key
+app.config['API_AUTH_ENABLED'] = API_AUTH_ENABLED
+app.config['EXPECTED_API_KEY'] = EXPECTED_API_KEY
+
+FLASK_HOST = config.flask_host
+FLASK_PORT = config.flask_port
+FLASK_DEBUG_MODE = config.flask_debug_mode
+
+twinkle_tray_base_path = config.twinkle_tray_path
+twinkle_tray_base_path_found = config.twinkle_tray_path_found
+
+# 启动时只解析一次 Twinkle Tray 是否可用 (shutil.which 会遍历 PATH，避免每个请求重复调用)
+TWINKLE_TRAY_AVAILABLE = twinkle_tray_base_path_found or bool(shutil.which(twinkle_tray_base_path))
 
 # --- Logging Setup ---
-log_dir = os.path.dirname(os.path.abspath(__file__)) # 日志文件与脚本/exe同目录
-log_file_path = os.path.join(log_dir, 'flask_api.log')
+log_file_path = config.log_file_path
 
 # 确保日志目录存在 (如果日志文件在子目录中)
-# if not os.path.exists(log_dir):
-#    os.makedirs(log_dir)
+# if not os.path.exists(SCRIPT_DIR):
+#    os.makedirs(SCRIPT_DIR)
+
+LOG_FLUSH_INTERVAL = 0.25 # 秒，缓冲日志的定时刷新间隔
+LOG_BUFFER_SIZE = 1 << 16
+
+class BufferedRotatingFileHandler(RotatingFileHandler):
+    """使用大缓冲区写日志，不在每条记录后 flush，由后台定时刷新。
+    自行累计已写入字节数判断是否需要轮转，避免每条记录都 seek/tell (BPO-46207)。
+    轮转时只把当前文件改名后立即重新打开，备份文件的逐个改名交给后台线程完成。"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._bytes_written = os.path.getsize(self.baseFilename) if os.path.exists(self.baseFilename) else 0
+        self._rollover_seq = 0
+        self._rotator = ThreadPoolExecutor(max_workers=1, thread_name_prefix='log-rotator')
+        self._sweep_stale_pending()
+
+    def _sweep_stale_pending(self):
+        # 上次进程在后台改名完成前退出时会残留 *.rotating* 文件，按时间顺序并入备份链
+        if self.backupCount <= 0: return
+        stale = sorted(glob.glob(glob.escape(self.baseFilename) + ".rotating*"), key=os.path.getmtime)
+        for pending_name in stale:
+            self._shift_backups(pending_name)
+
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=LOG_BUFFER_SIZE,
+                    encoding=self.encoding, errors=self.errors)
+
+    def _encoded_len(self, msg):
+        return len(msg.encode(self.encoding or 'utf-8', 'replace'))
+
+    def _needs_rollover(self, msg_len):
+        # 与标准库一致: maxBytes 或 backupCount 为 0 时不轮转
+        return self.maxBytes > 0 and self.backupCount > 0 and self._bytes_written + msg_len >= self.maxBytes
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        pending_name = None
+        if os.path.exists(self.baseFilename):
+            self._rollover_seq += 1
+            # 带上 pid 和时间戳，保证不会与其他进程/上次运行残留的文件重名
+            pending_name = f"{self.baseFilename}.rotating.{os.getpid()}.{time.time_ns()}.{self._rollover_seq}"
+            os.replace(self.baseFilename, pending_name)
+        if not self.delay:
+            self.stream = self._open()
+        self._bytes_written = 0
+        if pending_name:
+            # 单线程执行器保证多次轮转按提交顺序完成
+            self._rotator.submit(self._shift_backups, pending_name)
+
+    def _shift_backups(self, pending_name):
+        try:
+            for i in range(self.backupCount - 1, 0, -1):
+                sfn = self.rotation_filename(f"{self.baseFilename}.{i}")
+                dfn = self.rotation_filename(f"{self.baseFilename}.{i + 1}")
+                if os.path.exists(sfn):
+                    if os.path.exists(dfn):
+                        os.remove(dfn)
+                    os.rename(sfn, dfn)
+            dfn = self.rotation_filename(self.baseFilename + ".1")
+            if os.path.exists(dfn):
+                os.remove(dfn)
+            self.rotate(pending_name, dfn)
+        except OSError as e:
+            print(f"Log rotation failed for '{pending_name}': {e}", file=sys.stderr)
+
+    def close(self):
+        super().close()
+        self._rotator.shutdown(wait=True)
+
+    def emit(self, record):
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            msg = self.format(record) + self.terminator
+            msg_len = self._encoded_len(msg)
+            if self._needs_rollover(msg_len):
+                self.doRollover()
+            self.stream.write(msg)
+            self._bytes_written += msg_len
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+def _start_periodic_flush(handler, interval):
+    stop_event = threading.Event()
+    def _flush_loop():
+        while not stop_event.wait(interval):
+            handler.flush()
+    threading.Thread(target=_flush_loop, name='log-flusher', daemon=True).start()
+    return stop_event
 
 log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(module)s.%(funcName)s:%(lineno)d - %(message)s')
 # 使用 RotatingFileHandler 实现日志轮转
-file_handler = RotatingFileHandler(log_file_path, mode='a', maxBytes=5*1024*1024, # 5 MB
-                                 backupCount=3, encoding='utf-8', delay=False)
+file_handler = BufferedRotatingFileHandler(log_file_path, mode='a', maxBytes=5*1024*1024, # 5 MB
+                                         backupCount=3, encoding='utf-8', delay=False)
 file_handler.setFormatter(log_formatter)
 
 # 配置 Flask 的 logger 和 Werkzeug logger (Waitress 使用自己的日志，但Flask内部仍用werkzeug)
@@ -82,17 +227,67 @@ if FLASK_DEBUG_MODE: # 开发模式下日志级别更低
 else:
     log_level = logging.INFO
 
-app.logger.addHandler(file_handler)
+# 请求线程只把日志记录放入内存队列，由后台 QueueListener 线程负责写文件和轮转
+log_queue = queue.SimpleQueue()
+queue_handler = QueueHandler(log_queue)
+log_listener = QueueListener(log_queue, file_handler)
+log_listener.start()
+log_flush_stop_event = _start_periodic_flush(file_handler, LOG_FLUSH_INTERVAL)
+atexit.register(file_handler.flush)
+atexit.register(log_flush_stop_event.set)
+atexit.register(log_listener.stop)
+
+app.logger.addHandler(queue_handler)
 app.logger.setLevel(log_level)
 werkzeug_logger = logging.getLogger('werkzeug')
-werkzeug_logger.addHandler(file_handler)
+werkzeug_logger.addHandler(queue_handler)
 werkzeug_logger.setLevel(log_level) # 通常INFO级别足够
 
 app.logger.info("Flask API application starting...")
-app.logger.info(f"API Auth Enabled: {app.config['API_AUTH_ENABLED']}")
-if app.config['API_AUTH_ENABLED']:
-    app.logger.info(f"API Key configured (length): {len(app.config['EXPECTED_API_KEY'])}")
-app.logger.info(f"Twinkle Tray Path: {twinkle_tray_base_path} (Found: {twinkle_tray_base_path_found or bool(shutil.which(twinkle_tray_base_path))})")
+app.logger.info(f"API Auth Enabled: {API_AUTH_ENABLED}")
+if API_AUTH_ENABLED:
+    app.logger.info(f"API Key configured (length): {len(EXPECTED_API_KEY)}")
+app.logger.info(f"Twinkle Tray Path: {twinkle_tray_base_path} (Found: {TWINKLE_TRAY_AVAILABLE})")
+
+
+# --- JSON 序列化 (优先使用 orjson) ---
+def _stdlib_json_dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+try:
+    import orjson
+    def json_dumps(obj):
+        try:
+            return orjson.dumps(obj)
+        except TypeError: # orjson 不支持超出 64 位的整数等，回退到标准库
+            return _stdlib_json_dumps(obj)
+    json_loads = orjson.loads
+except ImportError:
+    app.logger.warning("orjson module not found, falling back to the standard json module. Run 'pip install orjson' for faster responses.")
+    json_dumps = _stdlib_json_dumps
+    json_loads = json.loads
+
+def json_response(payload, status=200):
+    return app.response_class(json_dumps(payload), status=status, mimetype='application/json')
+
+def static_json_response(body, status):
+    # body 为启动时预先序列化好的 bytes
+    return app.response_class(body, status=status, mimetype='application/json')
+
+# 固定内容的错误响应体，启动时序列化一次
+PYCAW_UNAVAILABLE_MESSAGE = "音频控制功能不可用 (pycaw 未加载)。"
+PYCAW_UNAVAILABLE_BODIES = {
+    action: json_dumps({"status": "error", "action": action, "message": PYCAW_UNAVAILABLE_MESSAGE})
+    for action in ("MUTE", "UNMUTE", "TOGGLE_MUTE")
+}
+PYCAW_UNAVAILABLE_BODIES[None] = json_dumps({"status": "error", "message": PYCAW_UNAVAILABLE_MESSAGE})
+TWINKLE_TRAY_NOT_FOUND_MESSAGE = f"Twinkle Tray 可执行文件 '{twinkle_tray_base_path}' 未找到。"
+TWINKLE_TRAY_NOT_FOUND_BODY = json_dumps({"status": "error", "message": TWINKLE_TRAY_NOT_FOUND_MESSAGE})
+INVALID_MONITOR_NUM_BODY = json_dumps({"status": "error", "message": "显示器编号必须是一个正整数。"})
+
+def twinkle_tray_unavailable_response():
+    app.logger.warning(f"Twinkle Tray executable '{twinkle_tray_base_path}' not found.")
+    return static_json_response(TWINKLE_TRAY_NOT_FOUND_BODY, 400)
 
 
 # --- COM and pycaw Setup ---
@@ -107,39 +302,60 @@ except ImportError:
     app.logger.error("pycaw library or its components not found. Audio control features will be disabled. Please run 'pip install pycaw'.")
     AudioUtilities = None
     IAudioEndpointVolume = None
+try:
+    from pycaw.callbacks import MMNotificationClient
+except ImportError:
+    app.logger.warning("pycaw.callbacks not available. Default audio device changes will not be detected; audio control keeps using the device that was default when it was first acquired.")
+    MMNotificationClient = None
 
 
 # --- Authentication Decorator ---
-def require_api_key(f):
+_AUTH_ENABLED = API_AUTH_ENABLED
+_EXPECTED_KEY_BYTES = EXPECTED_API_KEY.encode('utf-8')
+# 'X-API-Key' 请求头在 WSGI environ 中的键名，直接查 environ 可跳过 EnvironHeaders 每次的名称规范化
+_HDR_APIKEY_ENVIRON = sys.intern('HTTP_X_API_KEY')
+
+def _real_require_api_key(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if app.config.get('API_AUTH_ENABLED', False):
-            api_key = request.headers.get('X-API-Key')
-            expected_key = app.config.get('EXPECTED_API_KEY')
-            if not api_key:
-                app.logger.warning(f"Access denied to {request.path}: No API key provided.")
-                abort(401, description="API key required. Please provide it in the 'X-API-Key' header.")
-            if api_key != expected_key:
-                app.logger.warning(f"Access denied to {request.path}: Invalid API key.")
-                abort(403, description="Invalid API key.")
+        api_key = request.environ.get(_HDR_APIKEY_ENVIRON)
+        if not api_key:
+            app.logger.warning(f"Access denied to {request.path}: No API key provided.")
+            abort(401, description="API key required. Please provide it in the 'X-API-Key' header.")
+        # 常量时间比较，防止计时攻击
+        if not hmac.compare_digest(api_key.encode('utf-8'), _EXPECTED_KEY_BYTES):
+            app.logger.warning(f"Access denied to {request.path}: Invalid API key.")
+            abort(403, description="Invalid API key.")
         return f(*args, **kwargs)
     return decorated_function
 
+def require_api_key(f):
+    # 鉴权关闭时直接返回原视图函数，不额外包一层
+    return _real_require_api_key(f) if _AUTH_ENABLED else f
+
 # --- Helper Functions for subprocess ---
+# Twinkle Tray 的 CLI 把参数转发给已运行的托盘实例后即退出，无法作为常驻进程通过 stdin 接收命令，
+# 因此对所有命令统一禁止分配/显示控制台窗口，以降低每次启动进程的开销。
+SUBPROCESS_CREATIONFLAGS = getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+if hasattr(subprocess, 'STARTUPINFO'): # 仅 Windows
+    SUBPROCESS_STARTUPINFO = subprocess.STARTUPINFO()
+    SUBPROCESS_STARTUPINFO.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    SUBPROCESS_STARTUPINFO.wShowWindow = subprocess.SW_HIDE
+else:
+    SUBPROCESS_STARTUPINFO = None
+
 def run_command(command_parts):
-    app.logger.debug(f"Executing command: {command_parts}")
+    # stdout 不被使用，直接丢弃；只保留 stderr 管道，以便失败时把错误信息返回给客户端
+    app.logger.debug("Executing command: %s", command_parts)
     try:
-        creationflags = 0
-        if command_parts[0].lower() == 'powershell':
-            creationflags = getattr(subprocess, 'CREATE_NO_WINDOW', 0)
-            
-        process = subprocess.Popen(command_parts, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8', shell=False, creationflags=creationflags)
-        stdout, stderr = process.communicate(timeout=15)
+        process = subprocess.Popen(command_parts, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, encoding='utf-8', shell=False,
+                                   creationflags=SUBPROCESS_CREATIONFLAGS, startupinfo=SUBPROCESS_STARTUPINFO)
+        _, stderr = process.communicate(timeout=15)
         if process.returncode == 0:
-            app.logger.info(f"Command successful: {command_parts} -> Output: {stdout.strip() or 'No output'}")
-            return True, stdout.strip() or "命令成功执行。"
+            app.logger.info(f"Command successful: {command_parts}")
+            return True, "命令成功执行。"
         else:
-            error_message = stderr.strip() or stdout.strip() or f"未知错误 (返回码: {process.returncode})"
+            error_message = stderr.strip() or f"未知错误 (返回码: {process.returncode})"
             app.logger.error(f"Command failed: {command_parts} -> Error: {error_message}")
             return False, f"执行命令出错: {error_message}"
     except FileNotFoundError:
@@ -153,85 +369,194 @@ def run_command(command_parts):
         app.logger.exception(f"Unexpected error during command execution: {command_parts}")
         return False, f"发生意外错误: {str(e)}"
 
+# 子进程等待期间会释放 GIL，用线程池即可让多个命令并发执行
+SUBPROC_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix='twinkle')
+
+def run_command_many(list_of_command_parts):
+    # 并发执行多条命令，按输入顺序返回 [(success, message), ...]
+    return list(SUBPROC_POOL.map(run_command, list_of_command_parts))
+
 # --- Twinkle Tray: 单个显示器 VCP 电源控制 ---
-def get_twinkle_power_command_parts(monitor_num, power_state_vcp):
-    if not twinkle_tray_base_path_found and not shutil.which(twinkle_tray_base_path):
-         app.logger.warning(f"Twinkle Tray executable '{twinkle_tray_base_path}' not found.")
-         return None, f"Twinkle Tray 可执行文件 '{twinkle_tray_base_path}' 未找到。"
+# VCP 0xD6 (电源模式) 参数: 1 = 开启, 5 = 关闭/待机
+_VCP_ON_ARG = "--VCP=0xD6:1"
+_VCP_OFF_ARG = "--VCP=0xD6:5"
+
+def get_twinkle_power_command_parts(monitor_num, vcp_arg):
     if not isinstance(monitor_num, int) or monitor_num <= 0:
         return None, "显示器编号必须是一个正整数。"
-    return [twinkle_tray_base_path, f"--MonitorNum={monitor_num}", f"--VCP={power_state_vcp}"], None
+    return [twinkle_tray_base_path, f"--MonitorNum={monitor_num}", vcp_arg], None
 
 @app.route('/api/monitor/<int:monitor_num>/on', methods=['POST', 'GET'])
 @require_api_key
 def monitor_on_vcp(monitor_num):
-    command_parts, error = get_twinkle_power_command_parts(monitor_num, "0xD6:1")
-    if error: return jsonify({"status": "error", "message": error}), 400
+    if not TWINKLE_TRAY_AVAILABLE: return twinkle_tray_unavailable_response()
+    command_parts, error = get_twinkle_power_command_parts(monitor_num, _VCP_ON_ARG)
+    if error: return json_response({"status": "error", "message": error}, 400)
     success, message = run_command(command_parts)
-    if success: return jsonify({"status": "success", "monitor_num": monitor_num, "action": "MONITOR_ON_VCP", "message": "显示器已通过 VCP 命令打开。", "details": message}), 200
-    return jsonify({"status": "error", "monitor_num": monitor_num, "action": "MONITOR_ON_VCP", "message": "通过 VCP 命令打开显示器失败。", "details": message}), 500
+    if success: return json_response({"status": "success", "monitor_num": monitor_num, "action": "MONITOR_ON_VCP", "message": "显示器已通过 VCP 命令打开。", "details": message}, 200)
+    return json_response({"status": "error", "monitor_num": monitor_num, "action": "MONITOR_ON_VCP", "message": "通过 VCP 命令打开显示器失败。", "details": message}, 500)
 
 @app.route('/api/monitor/<int:monitor_num>/off', methods=['POST', 'GET'])
 @require_api_key
 def monitor_off_vcp(monitor_num):
-    command_parts, error = get_twinkle_power_command_parts(monitor_num, "0xD6:5") 
-    if error: return jsonify({"status": "error", "message": error}), 400
+    if not TWINKLE_TRAY_AVAILABLE: return twinkle_tray_unavailable_response()
+    command_parts, error = get_twinkle_power_command_parts(monitor_num, _VCP_OFF_ARG) 
+    if error: return json_response({"status": "error", "message": error}, 400)
     success, message = run_command(command_parts)
-    if success: return jsonify({"status": "success", "monitor_num": monitor_num, "action": "MONITOR_OFF_VCP", "message": "显示器已通过 VCP 命令关闭/待机。", "details": message}), 200
-    return jsonify({"status": "error", "monitor_num": monitor_num, "action": "MONITOR_OFF_VCP", "message": "通过 VCP 命令关闭/待机显示器失败。", "details": message}), 500
+    if success: return json_response({"status": "success", "monitor_num": monitor_num, "action": "MONITOR_OFF_VCP", "message": "显示器已通过 VCP 命令关闭/待机。", "details": message}, 200)
+    return json_response({"status": "error", "monitor_num": monitor_num, "action": "MONITOR_OFF_VCP", "message": "通过 VCP 命令关闭/待机显示器失败。", "details": message}, 500)
 
 # --- Twinkle Tray: 亮度控制 ---
 def get_twinkle_brightness_command_parts(monitor_num_input, brightness_level):
-    if not twinkle_tray_base_path_found and not shutil.which(twinkle_tray_base_path):
-         app.logger.warning(f"Twinkle Tray executable '{twinkle_tray_base_path}' not found.")
-         return None, f"Twinkle Tray 可执行文件 '{twinkle_tray_base_path}' 未找到。"
     valid_brightness = isinstance(brightness_level, int) and 0 <= brightness_level <= 100
     if not valid_brightness: return None, "亮度值必须是 0 到 100 之间的整数。"
 
-    try:
-        monitor_num = int(monitor_num_input)
-        if monitor_num == 0: # Convention for "all monitors"
-            return [twinkle_tray_base_path, "--AllMonitors", f"--Set={brightness_level}"], None
-        elif monitor_num > 0:
-            return [twinkle_tray_base_path, f"--MonitorNum={monitor_num}", f"--Set={brightness_level}"], None
-        else: # Negative numbers are invalid
-            return None, "显示器编号不能为负数。"
-    except ValueError: # monitor_num_input was not an int (e.g. "all")
-        if str(monitor_num_input).lower() == "all":
-             return [twinkle_tray_base_path, "--AllMonitors", f"--Set={brightness_level}"], None
-        else:
-            return None, f"无效的显示器编号: '{monitor_num_input}'。应为正整数, 0, 或 'all'。"
+    # 路由经 int_or_all 转换器传入 int 或 "all"；其他调用方可能传入数字字符串，显式分派而不依赖 try/except
+    if isinstance(monitor_num_input, str) and monitor_num_input.isdecimal(): # 不用 isdigit()，它会接受 "²" 等 int() 无法解析的字符
+        monitor_num_input = int(monitor_num_input)
+    if monitor_num_input == "all" or monitor_num_input == 0: # 0 is the convention for "all monitors"
+        return [twinkle_tray_base_path, "--AllMonitors", f"--Set={brightness_level}"], None
+    elif isinstance(monitor_num_input, int) and monitor_num_input > 0:
+        return [twinkle_tray_base_path, f"--MonitorNum={monitor_num_input}", f"--Set={brightness_level}"], None
+    else:
+        return None, f"无效的显示器编号: '{monitor_num_input}'。应为正整数, 0, 或 'all'。"
 
-@app.route('/api/monitor/<path:monitor_num_str>/brightness/<int:level>', methods=['POST', 'GET'])
+@app.route('/api/monitor/<int_or_all:monitor_num_str>/brightness/<int:level>', methods=['POST', 'GET'])
 @require_api_key
 def set_monitor_brightness(monitor_num_str, level):
-    target_description = f"显示器 {monitor_num_str}" if monitor_num_str.isdigit() and int(monitor_num_str) > 0 else "所有显示器"
+    if not TWINKLE_TRAY_AVAILABLE: return twinkle_tray_unavailable_response()
+    target_description = f"显示器 {monitor_num_str}" if monitor_num_str != "all" and monitor_num_str > 0 else "所有显示器"
     
     command_parts, error = get_twinkle_brightness_command_parts(monitor_num_str, level)
     if error: 
         app.logger.error(f"Brightness command generation error for monitor '{monitor_num_str}', level {level}: {error}")
-        return jsonify({"status": "error", "message": error}), 400
+        return json_response({"status": "error", "message": error}, 400)
     
     success, message = run_command(command_parts)
     if success: 
-        return jsonify({"status": "success", "target": target_description, "brightness_level": level, "message": f"{target_description} 亮度已设置为 {level}%。", "details": message}), 200
-    return jsonify({"status": "error", "target": target_description, "brightness_level": level, "message": f"设置 {target_description} 亮度为 {level}% 失败。", "details": message}), 500
+        return json_response({"status": "success", "target": target_description, "brightness_level": level, "message": f"{target_description} 亮度已设置为 {level}%。", "details": message}, 200)
+    return json_response({"status": "error", "target": target_description, "brightness_level": level, "message": f"设置 {target_description} 亮度为 {level}% 失败。", "details": message}, 500)
+
+# --- Twinkle Tray: 批量亮度控制 ---
+BULK_BRIGHTNESS_MAX_ITEMS = 16 # 单个请求允许的最大条目数，防止一次请求排入大量子进程
+def _normalize_bulk_monitor(monitor):
+    # 与 int_or_all 转换器保持一致: 非负整数或 'all' (不区分大小写)，0 与 'all' 都表示所有显示器
+    if isinstance(monitor, str):
+        if monitor.lower() == "all": return "all"
+        if monitor.isdecimal(): monitor = int(monitor) # isdigit() 会接受 "²" 等 int() 无法解析的字符
+    if isinstance(monitor, int) and not isinstance(monitor, bool) and monitor >= 0:
+        return "all" if monitor == 0 else monitor
+    return None
+
+def _plan_bulk_brightness(items):
+    # 返回 (all_monitors_level, {monitor: level}, error)。
+    # 同一目标只保留最后一次设置；单个显示器的设置在"所有显示器"之后执行，从而覆盖它。
+    if not isinstance(items, list) or not items:
+        return None, None, "请求体必须是非空的 JSON 数组，如 [{\"monitor\": 1, \"level\": 70}]。"
+    if len(items) > BULK_BRIGHTNESS_MAX_ITEMS:
+        return None, None, f"条目过多: {len(items)}。单次请求最多 {BULK_BRIGHTNESS_MAX_ITEMS} 项。"
+    all_level = None
+    per_monitor = {}
+    for item in items:
+        if not isinstance(item, dict):
+            return None, None, f"无效的条目: {item!r}。"
+        monitor = _normalize_bulk_monitor(item.get("monitor"))
+        level = item.get("level")
+        if monitor is None:
+            return None, None, f"无效的显示器编号: '{item.get('monitor')}'。应为正整数, 0, 或 'all'。"
+        if not isinstance(level, int) or isinstance(level, bool) or not 0 <= level <= 100:
+            return None, None, "亮度值必须是 0 到 100 之间的整数。"
+        if monitor == "all":
+            all_level = level
+            per_monitor = {} # 之前的单个显示器设置会被"所有显示器"覆盖
+        else:
+            per_monitor[monitor] = level
+    if all_level is not None:
+        per_monitor = {m: l for m, l in per_monitor.items() if l != all_level}
+    return all_level, per_monitor, None
+
+@app.route('/api/monitor/brightness/bulk', methods=['POST'])
+@require_api_key
+def set_monitor_brightness_bulk():
+    if not TWINKLE_TRAY_AVAILABLE: return twinkle_tray_unavailable_response()
+    try:
+        items = json_loads(request.get_data())
+    except ValueError:
+        return json_response({"status": "error", "action": "BULK_BRIGHTNESS", "message": "请求体不是有效的 JSON。"}, 400)
+    all_level, per_monitor, error = _plan_bulk_brightness(items)
+    if error:
+        app.logger.error(f"Bulk brightness request rejected: {error}")
+        return json_response({"status": "error", "action": "BULK_BRIGHTNESS", "message": error}, 400)
+
+    results = []
+    if all_level is not None:
+        command_parts, _ = get_twinkle_brightness_command_parts("all", all_level)
+        success, message = run_command(command_parts)
+        results.append({"target": "所有显示器", "brightness_level": all_level, "success": success, "details": message})
+    if per_monitor:
+        jobs = [(monitor, level, get_twinkle_brightness_command_parts(monitor, level)[0]) for monitor, level in per_monitor.items()]
+        outcomes = run_command_many([command_parts for _, _, command_parts in jobs])
+        for (monitor, level, _), (success, message) in zip(jobs, outcomes):
+            results.append({"target": f"显示器 {monitor}", "brightness_level": level, "success": success, "details": message})
+
+    if all(result["success"] for result in results):
+        return json_response({"status": "success", "action": "BULK_BRIGHTNESS", "message": f"已完成 {len(results)} 项亮度设置。", "results": results}, 200)
+    return json_response({"status": "error", "action": "BULK_BRIGHTNESS", "message": "部分或全部亮度设置失败。", "results": results}, 500)
 
 # --- 系统音频控制 (pycaw) ---
+# 所有 pycaw/COM 调用都在一个常驻的工作线程中执行：COM 只初始化一次，
+# IAudioEndpointVolume 接口被缓存复用，请求线程通过队列提交操作并等待结果。
+AUDIO_OP_TIMEOUT = 15 # 秒，请求线程等待音频工作线程回复的最长时间
+_audio_op_queue = queue.Queue()
+_AUDIO_OP_ERROR_PREFIXES = {
+    'get_mute': "获取系统静音状态时出错",
+    'set_mute': "设置系统静音时出错",
+    'toggle_mute': "切换系统静音时出错",
+}
+
+def _init_com_for_worker():
+    if not pythoncom: return None
+    try:
+        pythoncom.CoInitializeEx(pythoncom.COINIT_MULTITHREADED)
+    except AttributeError: pass
+    except Exception as e:
+        if "already initialized" not in str(e).lower() and "RPC_E_CHANGED_MODE" not in str(e).upper():
+            app.logger.error(f"COM initialization failed: {e}")
+            return f"COM 初始化失败: {e}"
+    return None
+
+# 默认音频设备变化 (如插拔耳机) 时由 COM 回调置位，工作线程在下一次操作前重新获取接口
+_audio_endpoint_needs_refresh = threading.Event()
+
+if MMNotificationClient is not None:
+    class _DefaultDeviceChangeClient(MMNotificationClient):
+        def on_default_device_changed(self, *args):
+            _audio_endpoint_needs_refresh.set()
+
+def _register_device_change_callback():
+    # 返回 (enumerator, callback)，调用方需持有引用以免被回收
+    if MMNotificationClient is None: return None, None
+    try:
+        enumerator = AudioUtilities.GetDeviceEnumerator()
+        callback = _DefaultDeviceChangeClient()
+        enumerator.RegisterEndpointNotificationCallback(callback)
+        return enumerator, callback
+    except Exception as e:
+        app.logger.warning(f"Failed to register audio device change callback: {e}")
+        return None, None
+
+def _unregister_device_change_callback(enumerator, callback):
+    # Windows 要求在释放前注销 IMMNotificationClient 回调
+    if enumerator is None: return
+    try:
+        enumerator.UnregisterEndpointNotificationCallback(callback)
+    except Exception as e:
+        app.logger.warning(f"Failed to unregister audio device change callback: {e}")
+
 def _get_master_volume_control():
+    # 必须在已初始化 COM 的音频工作线程中调用
     if AudioUtilities is None or IAudioEndpointVolume is None:
         return None, "pycaw 库或其必要组件未加载。"
-    com_initialized_here = False
-    if pythoncom:
-        try:
-            hr = pythoncom.CoInitializeEx(pythoncom.COINIT_APARTMENTTHREADED)
-            if hr == 0 or hr == 1: com_initialized_here = True
-            elif hr == -2147417850: pass 
-        except AttributeError: pass 
-        except Exception as e:
-            if "already initialized" not in str(e).lower() and "RPC_E_CHANGED_MODE" not in str(e).upper():
-                 app.logger.error(f"COM initialization failed: {e}")
-                 return None, f"COM 初始化失败: {e}"
     master_volume = None; error_message = None
     try:
         speakers = AudioUtilities.GetSpeakers()
@@ -248,85 +573,149 @@ def _get_master_volume_control():
     except Exception as e: 
         app.logger.error(f"Error getting master volume control: {e}")
         error_message = f"获取主音量控制时出错: {str(e)}"
-    finally:
-        if com_initialized_here and pythoncom:
-            try: pythoncom.CoUninitialize()
-            except Exception as e_un: app.logger.warning(f"Error during CoUninitialize: {e_un}")
     if error_message: return None, error_message
     if master_volume is None and not error_message: return None, "未能成功激活主音量控制接口。"
     return master_volume, None
 
+def _run_audio_op(master_volume, op, arg):
+    if op == 'get_mute':
+        return bool(master_volume.GetMute())
+    if op == 'set_mute':
+        master_volume.SetMute(1 if arg else 0, None)
+        return bool(arg)
+    if op == 'toggle_mute':
+        new_state = not master_volume.GetMute()
+        master_volume.SetMute(1 if new_state else 0, None)
+        return new_state
+    raise ValueError(f"Unknown audio op: {op}")
+
+def _audio_worker():
+    com_error = _init_com_for_worker()
+    enumerator, notification_callback = _register_device_change_callback() if not com_error else (None, None)
+    master_volume = None
+    while True:
+        item = _audio_op_queue.get()
+        if item is None: break # 退出信号，见 _stop_audio_worker
+        op, arg, reply_queue, claim = item
+        # 请求线程已因超时取消该操作时跳过，避免已向客户端报告失败的操作稍后生效
+        if not claim.acquire(blocking=False): continue
+        if com_error:
+            reply_queue.put((None, com_error)); continue
+        if _audio_endpoint_needs_refresh.is_set():
+            _audio_endpoint_needs_refresh.clear()
+            app.logger.info("Default audio device changed, re-acquiring master volume control.")
+            master_volume = None
+        if master_volume is None:
+            master_volume, error = _get_master_volume_control()
+            if error:
+                reply_queue.put((None, error)); continue
+        try:
+            reply_queue.put((_run_audio_op(master_volume, op, arg), None))
+        except Exception as e:
+            app.logger.exception(f"Error during audio op '{op}'.")
+            master_volume = None # 丢弃可能已失效的接口，下次操作时重新获取
+            reply_queue.put((None, f"{_AUDIO_OP_ERROR_PREFIXES.get(op, '音频操作出错')}: {str(e)}"))
+    _unregister_device_change_callback(enumerator, notification_callback)
+    master_volume = enumerator = notification_callback = None
+    if pythoncom and not com_error:
+        try: pythoncom.CoUninitialize()
+        except Exception as e_un: app.logger.warning(f"Error during CoUninitialize: {e_un}")
+
+def _submit_audio_op(op, arg=None):
+    if AudioUtilities is None or IAudioEndpointVolume is None:
+        return None, "pycaw 库或其必要组件未加载。"
+    reply_queue = queue.Queue(maxsize=1)
+    # claim 由工作线程 (开始执行) 或请求线程 (超时取消) 中先到的一方获取，保证二者只发生其一
+    claim = threading.Lock()
+    _audio_op_queue.put((op, arg, reply_queue, claim))
+    try:
+        return reply_queue.get(timeout=AUDIO_OP_TIMEOUT)
+    except queue.Empty:
+        pass
+    if claim.acquire(blocking=False):
+        app.logger.error(f"Audio op '{op}' timed out after {AUDIO_OP_TIMEOUT}s and was cancelled before it ran.")
+        return None, "音频操作超时。"
+    # 工作线程已开始执行该操作，继续等待其结果
+    try:
+        return reply_queue.get(timeout=AUDIO_OP_TIMEOUT)
+    except queue.Empty:
+        app.logger.error(f"Audio op '{op}' is still running after {2 * AUDIO_OP_TIMEOUT}s; its outcome is unknown.")
+        return None, "音频操作超时，操作可能仍会生效。"
+
+def _stop_audio_worker(worker_thread):
+    _audio_op_queue.put(None)
+    worker_thread.join(timeout=AUDIO_OP_TIMEOUT)
+
+if AudioUtilities is not None and IAudioEndpointVolume is not None:
+    _audio_worker_thread = threading.Thread(target=_audio_worker, name='pycaw-worker', daemon=True)
+    _audio_worker_thread.start()
+    atexit.register(_stop_audio_worker, _audio_worker_thread)
+
 def set_system_mute(mute_state: bool):
-    master_volume, error = _get_master_volume_control()
+    result, error = _submit_audio_op('set_mute', mute_state)
     if error: return False, error
-    try:
-        master_volume.SetMute(1 if mute_state else 0, None)
-        app.logger.info(f"System mute state set to: {mute_state}")
-        return True, f"系统主音量静音状态已设置为 {'静音' if mute_state else '取消静音'}。"
-    except Exception as e: 
-        app.logger.exception("Error setting system mute state.")
-        return False, f"设置系统静音时出错: {str(e)}"
+    app.logger.info(f"System mute state set to: {mute_state}")
+    return True, f"系统主音量静音状态已设置为 {'静音' if mute_state else '取消静音'}。"
+
+def toggle_system_mute():
+    # 在工作线程中一次完成 GetMute + SetMute，返回切换后的状态
+    new_state, error = _submit_audio_op('toggle_mute')
+    if error: return None, error
+    app.logger.info(f"System mute state toggled to: {new_state}")
+    return new_state, f"系统主音量静音状态已设置为 {'静音' if new_state else '取消静音'}。"
 
 def get_system_mute_status():
-    master_volume, error = _get_master_volume_control()
+    muted, error = _submit_audio_op('get_mute')
     if error: return None, error
-    try:
-        muted = master_volume.GetMute()
-        app.logger.debug(f"Current system mute status: {bool(muted)}")
-        return bool(muted), "成功获取静音状态。"
-    except Exception as e: 
-        app.logger.exception("Error getting system mute status.")
-        return None, f"获取系统静音状态时出错: {str(e)}"
+    app.logger.debug("Current system mute status: %s", muted)
+    return muted, "成功获取静音状态。"
 
 @app.route('/api/audio/mute', methods=['POST', 'GET'])
 @require_api_key
 def audio_mute():
-    if AudioUtilities is None: return jsonify({"status": "error", "action": "MUTE", "message": "音频控制功能不可用 (pycaw 未加载)。"}), 503
+    if AudioUtilities is None: return static_json_response(PYCAW_UNAVAILABLE_BODIES["MUTE"], 503)
     success, message = set_system_mute(True)
-    if success: return jsonify({"status": "success", "action": "MUTE", "audio_muted": True, "message": "系统音频已静音。", "details": message}), 200
-    return jsonify({"status": "error", "action": "MUTE", "message": "静音系统音频失败。", "details": message}), 500
+    if success: return json_response({"status": "success", "action": "MUTE", "audio_muted": True, "message": "系统音频已静音。", "details": message}, 200)
+    return json_response({"status": "error", "action": "MUTE", "message": "静音系统音频失败。", "details": message}, 500)
 
 # ... (audio_unmute, audio_mute_toggle, audio_status 保持与之前类似, 确保日志记录)
 @app.route('/api/audio/unmute', methods=['POST', 'GET'])
 @require_api_key
 def audio_unmute():
-    if AudioUtilities is None: return jsonify({"status": "error", "action": "UNMUTE", "message": "音频控制功能不可用 (pycaw 未加载)。"}), 503
+    if AudioUtilities is None: return static_json_response(PYCAW_UNAVAILABLE_BODIES["UNMUTE"], 503)
     success, message = set_system_mute(False)
-    if success: return jsonify({"status": "success", "action": "UNMUTE", "audio_muted": False, "message": "系统音频已取消静音。", "details": message}), 200
-    return jsonify({"status": "error", "action": "UNMUTE", "message": "取消系统音频静音失败。", "details": message}), 500
+    if success: return json_response({"status": "success", "action": "UNMUTE", "audio_muted": False, "message": "系统音频已取消静音。", "details": message}, 200)
+    return json_response({"status": "error", "action": "UNMUTE", "message": "取消系统音频静音失败。", "details": message}, 500)
 
 @app.route('/api/audio/mute/toggle', methods=['POST', 'GET'])
 @require_api_key
 def audio_mute_toggle():
-    if AudioUtilities is None: return jsonify({"status": "error", "action": "TOGGLE_MUTE", "message": "音频控制功能不可用 (pycaw 未加载)。"}), 503
-    current_mute_state, msg = get_system_mute_status()
-    if current_mute_state is None: return jsonify({"status": "error", "action": "TOGGLE_MUTE", "message": "获取当前静音状态失败。", "details": msg}), 500
-    new_mute_state = not current_mute_state; success, message = set_system_mute(new_mute_state)
-    if success: return jsonify({"status": "success", "action": "TOGGLE_MUTE", "audio_muted": new_mute_state, "message": f"系统音频静音状态已切换为: {'静音' if new_mute_state else '取消静音'}", "details": message}), 200
-    return jsonify({"status": "error", "action": "TOGGLE_MUTE", "message": "切换系统音频静音失败。", "details": message}), 500
+    if AudioUtilities is None: return static_json_response(PYCAW_UNAVAILABLE_BODIES["TOGGLE_MUTE"], 503)
+    new_mute_state, message = toggle_system_mute()
+    if new_mute_state is not None: return json_response({"status": "success", "action": "TOGGLE_MUTE", "audio_muted": new_mute_state, "message": f"系统音频静音状态已切换为: {'静音' if new_mute_state else '取消静音'}", "details": message}, 200)
+    return json_response({"status": "error", "action": "TOGGLE_MUTE", "message": "切换系统音频静音失败。", "details": message}, 500)
 
 @app.route('/api/audio/status', methods=['GET'])
 @require_api_key
 def audio_status():
-    if AudioUtilities is None: return jsonify({"status": "error", "message": "音频控制功能不可用 (pycaw 未加载)。"}), 503
+    if AudioUtilities is None: return static_json_response(PYCAW_UNAVAILABLE_BODIES[None], 503)
     muted, message = get_system_mute_status()
-    if muted is not None: return jsonify({"status": "success", "audio_muted": muted, "message": "成功获取音频状态。", "details": message}), 200
-    return jsonify({"status": "error", "message": "获取音频状态失败。", "details": message}), 500
+    if muted is not None: return json_response({"status": "success", "audio_muted": muted, "message": "成功获取音频状态。", "details": message}, 200)
+    return json_response({"status": "error", "message": "获取音频状态失败。", "details": message}, 500)
 
 # --- 状态（占位符） ---
 @app.route('/api/monitor/<int:monitor_num>/status-placeholder', methods=['GET'])
 @require_api_key
 def monitor_status_placeholder(monitor_num):
-    if not isinstance(monitor_num, int) or monitor_num <= 0: return jsonify({"status": "error", "message": "显示器编号必须是一个正整数。"}), 400
-    return jsonify({"status": "info", "monitor_num": monitor_num, "message": "此接口为状态查询占位符。"}), 200
+    if not isinstance(monitor_num, int) or monitor_num <= 0: return static_json_response(INVALID_MONITOR_NUM_BODY, 400)
+    return json_response({"status": "info", "monitor_num": monitor_num, "message": "此接口为状态查询占位符。"}, 200)
 
 
 if __name__ == '__main__':
     # 启动前的检查和日志
     if not twinkle_tray_base_path_found:
-        if shutil.which(twinkle_tray_base_path):
+        if TWINKLE_TRAY_AVAILABLE:
             app.logger.info(f"Twinkle Tray 将从 PATH 调用 ('{twinkle_tray_base_path}')。")
-            twinkle_tray_base_path_found = True # 标记，避免重复检查
         else:
             app.logger.error(f"在预设路径及系统 PATH 中均未找到 Twinkle Tray ('{twinkle_tray_base_path}')。显示器亮度/VCP电源控制功能可能无法使用。")
     elif twinkle_tray_base_path_found:
@@ -338,10 +727,11 @@ if __name__ == '__main__':
         app.logger.warning("pythoncom 模块未加载 (尝试 'pip install pywin32')。COM 初始化可能无法进行，音频功能可能会受影响。")
 
     app.logger.info(f"Flask API 服务器正在启动 on http://{FLASK_HOST}:{FLASK_PORT} (Debug: {FLASK_DEBUG_MODE})")
-    app.logger.info("请确保已安装所有依赖: pip install Flask python-dotenv pycaw pywin32 waitress")
+    app.logger.info("请确保已安装所有依赖: pip install Flask python-dotenv pycaw pywin32 waitress orjson")
     
     if FLASK_DEBUG_MODE:
         app.run(host=FLASK_HOST, port=FLASK_PORT, debug=True)
     else:
         from waitress import serve
-        serve(app, host=FLASK_HOST, port=FLASK_PORT, threads=8) # threads 可以根据需要调整
\ No newline at end of file
+        serve(app, host=FLASK_HOST, port=FLASK_PORT, threads=config.waitress_threads,
+              connection_limit=config.waitress_connection_limit, channel_timeout=config.waitress_channel_timeout)
\ No newline at end of file